@@ -5,8 +5,11 @@ Main script for automated unit management table creation
 
 import os
 import sys
+import logging
 import argparse
-from typing import Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
@@ -15,87 +18,144 @@ from pdf_processor import PDFProcessor
 from sheets_writer import GoogleSheetsWriter
 from data_processor import DataProcessor
 
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
+
+log = logging.getLogger(__name__)
+
 
 class UnitManagementTableCreator:
     """
     Main orchestrator for creating unit management tables from PDFs
     """
     
-    def __init__(self, cache_dir: str = "cache", credentials_path: str = "config/credentials.json"):
+    # Rows sent per append request
+    WRITE_CHUNK_ROWS = 500
+    
+    def __init__(self, cache_dir: str = "cache", credentials_path: str = "config/credentials.json",
+                 max_workers: Optional[int] = None, cache_format: str = "json",
+                 extract_images: bool = False, gzip_requests: bool = False):
         """
         Initialize the creator
         
         Args:
             cache_dir: Directory for caching PDF extraction results
             credentials_path: Path to Google API credentials
+            max_workers: Number of processes for PDF page extraction (default: CPU count)
+            cache_format: Serialization format for the extraction cache ('json' or 'msgpack')
+            extract_images: Whether to decode embedded images during extraction
+            gzip_requests: Whether to gzip-compress large Sheets request bodies
         """
-        self.pdf_processor = PDFProcessor(cache_dir=cache_dir)
+        self.pdf_processor = PDFProcessor(cache_dir=cache_dir, max_workers=max_workers,
+                                          cache_format=cache_format, extract_images=extract_images)
         self.data_processor = DataProcessor(cache_dir=cache_dir)
         self.sheets_writer = None
         self.credentials_path = credentials_path
+        self.gzip_requests = gzip_requests
     
     def _init_sheets_writer(self):
         """Initialize sheets writer lazily"""
         if self.sheets_writer is None:
             try:
-                self.sheets_writer = GoogleSheetsWriter(credentials_path=self.credentials_path)
+                writer = GoogleSheetsWriter(credentials_path=self.credentials_path,
+                                            gzip_requests=self.gzip_requests)
+                # The writer authenticates lazily; do it now so missing
+                # credentials fall back to cache-only mode here
+                writer.service
+                self.sheets_writer = writer
             except FileNotFoundError as e:
-                print(f"\nError: {e}")
-                print("\nTo use Google Sheets integration, you need to:")
-                print("1. Go to https://console.cloud.google.com/")
-                print("2. Create a new project or select existing one")
-                print("3. Enable Google Sheets API")
-                print("4. Create OAuth 2.0 credentials")
-                print("5. Download credentials and save as 'config/credentials.json'")
-                print("\nFor now, the data will only be cached locally.")
+                log.warning(f"\nError: {e}")
+                log.warning("\nTo use Google Sheets integration, you need to:")
+                log.warning("1. Go to https://console.cloud.google.com/")
+                log.warning("2. Create a new project or select existing one")
+                log.warning("3. Enable Google Sheets API")
+                log.warning("4. Create OAuth 2.0 credentials")
+                log.warning("5. Download credentials and save as 'config/credentials.json'")
+                log.warning("\nFor now, the data will only be cached locally.")
                 return False
         return True
     
-    def process_pdf(self, pdf_path: str, spreadsheet_id: Optional[str] = None,
-                   spreadsheet_title: Optional[str] = None, use_cache: bool = True) -> dict:
+    def _build_rows(self, pdf_path: str, use_cache: bool = True,
+                    extracted_data: Optional[dict] = None) -> Tuple[dict, List[dict], List[list]]:
         """
-        Process a PDF file and create/update spreadsheet
+        Extract a PDF and turn it into spreadsheet rows (steps 1-4)
         
         Args:
             pdf_path: Path to PDF file
-            spreadsheet_id: Existing spreadsheet ID (optional)
-            spreadsheet_title: Title for new spreadsheet (optional)
             use_cache: Whether to use cached PDF extraction
+            extracted_data: Result of an extraction already run for this PDF (optional)
             
         Returns:
-            Dictionary with processing results
+            Tuple of (extracted_data, chapters, rows)
         """
-        print(f"\n{'='*60}")
-        print(f"Processing PDF: {pdf_path}")
-        print(f"{'='*60}\n")
-        
-        # Validate PDF exists
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-        
         # Step 1: Extract text and data from PDF
-        print("Step 1: Extracting text from PDF...")
-        extracted_data = self.pdf_processor.extract_text_from_pdf(pdf_path, use_cache=use_cache)
-        print(f"  ✓ Extracted {extracted_data['total_pages']} pages")
+        log.info("Step 1: Extracting text from PDF...")
+        if extracted_data is None:
+            # Validate PDF exists
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+            
+            extracted_data = self.pdf_processor.extract_text_from_pdf(pdf_path, use_cache=use_cache)
+        log.info(f"  ✓ Extracted {extracted_data['total_pages']} pages")
         
         # Step 2: Extract chapter structure
-        print("\nStep 2: Analyzing document structure...")
+        log.info("\nStep 2: Analyzing document structure...")
         chapters = self.pdf_processor.extract_chapter_structure(extracted_data)
-        print(f"  ✓ Found {len(chapters)} chapters/units")
+        log.info(f"  ✓ Found {len(chapters)} chapters/units")
         for i, chapter in enumerate(chapters, 1):
-            print(f"    {i}. {chapter['title'][:60]}..." if len(chapter['title']) > 60 else f"    {i}. {chapter['title']}")
+            log.debug(f"    {i}. {chapter['title'][:60]}..." if len(chapter['title']) > 60 else f"    {i}. {chapter['title']}")
         
         # Step 3: Extract metadata
-        print("\nStep 3: Extracting metadata...")
+        log.info("\nStep 3: Extracting metadata...")
         metadata = self.pdf_processor.extract_metadata(extracted_data)
-        print(f"  ✓ Found {len(metadata['learning_goals'])} learning goal sections")
-        print(f"  ✓ Found {len(metadata['homework_tasks'])} homework sections")
-        print(f"  ✓ Found {len(metadata['review_questions'])} review question sections")
+        log.info(f"  ✓ Found {len(metadata['learning_goals'])} learning goal sections")
+        log.info(f"  ✓ Found {len(metadata['homework_tasks'])} homework sections")
+        log.info(f"  ✓ Found {len(metadata['review_questions'])} review question sections")
         
         # Step 4: Process data
-        print("\nStep 4: Processing and organizing data...")
+        log.info("\nStep 4: Processing and organizing data...")
         rows = self.data_processor.process_pdf_data(extracted_data, chapters, metadata)
-        print(f"  ✓ Created {len(rows)} rows for spreadsheet")
+        log.info(f"  ✓ Created {len(rows)} rows for spreadsheet")
+        
+        return extracted_data, chapters, rows
+    
+    def _write_rows(self, spreadsheet_id: str, rows: List[list]):
+        """
+        Append rows in chunks, so a failure only resends the current chunk
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            rows: Rows to append
+        """
+        for start in range(0, len(rows), self.WRITE_CHUNK_ROWS):
+            # Rate-limited chunks are retried with backoff by the writer
+            self.sheets_writer.batch_append_rows(spreadsheet_id, "Sheet1",
+                                                 rows[start:start + self.WRITE_CHUNK_ROWS])
+            
+            if len(rows) > self.WRITE_CHUNK_ROWS:
+                log.info(f"  Written {min(start + self.WRITE_CHUNK_ROWS, len(rows))}/{len(rows)} rows")
+    
+    def process_pdf(self, pdf_path: str, spreadsheet_id: Optional[str] = None,
+                   spreadsheet_title: Optional[str] = None, use_cache: bool = True) -> dict:
+        """
+        Process a PDF file and create/update spreadsheet
+        
+        Args:
+            pdf_path: Path to PDF file
+            spreadsheet_id: Existing spreadsheet ID (optional)
+            spreadsheet_title: Title for new spreadsheet (optional)
+            use_cache: Whether to use cached PDF extraction
+            
+        Returns:
+            Dictionary with processing results
+        """
+        log.info(f"\n{'='*60}")
+        log.info(f"Processing PDF: {pdf_path}")
+        log.info(f"{'='*60}\n")
+        
+        extracted_data, chapters, rows = self._build_rows(pdf_path, use_cache=use_cache)
         
         # Step 5: Write to Google Sheets (if configured)
         result = {
@@ -107,51 +167,65 @@ class UnitManagementTableCreator:
         }
         
         if self._init_sheets_writer():
-            print("\nStep 5: Writing to Google Sheets...")
+            log.info("\nStep 5: Writing to Google Sheets...")
             
             # Create or use existing spreadsheet
             if not spreadsheet_id:
                 if not spreadsheet_title:
                     spreadsheet_title = f"Unit Management - {os.path.basename(pdf_path)}"
                 
-                print(f"  Creating new spreadsheet: {spreadsheet_title}")
+                log.info(f"  Creating new spreadsheet: {spreadsheet_title}")
                 spreadsheet_id = self.sheets_writer.create_spreadsheet(spreadsheet_title)
-                print(f"  ✓ Spreadsheet created: {spreadsheet_id}")
+                log.info(f"  ✓ Spreadsheet created: {spreadsheet_id}")
                 
                 # Setup headers
-                print("  Setting up headers...")
+                log.info("  Setting up headers...")
                 self.sheets_writer.setup_headers(spreadsheet_id)
-                print("  ✓ Headers configured")
+                log.info("  ✓ Headers configured")
             
             # Write data
-            print("  Writing data rows...")
-            self.sheets_writer.batch_append_rows(spreadsheet_id, "Sheet1", rows)
-            print(f"  ✓ Written {len(rows)} rows")
+            log.info("  Writing data rows...")
+            self._write_rows(spreadsheet_id, rows)
+            log.info(f"  ✓ Written {len(rows)} rows")
             
             # Get URL
             spreadsheet_url = self.sheets_writer.get_spreadsheet_url(spreadsheet_id)
             result['spreadsheet_id'] = spreadsheet_id
             result['spreadsheet_url'] = spreadsheet_url
             
-            print(f"\n{'='*60}")
-            print(f"✓ Processing complete!")
-            print(f"{'='*60}")
-            print(f"\nSpreadsheet URL: {spreadsheet_url}")
+            log.info(f"\n{'='*60}")
+            log.info(f"✓ Processing complete!")
+            log.info(f"{'='*60}")
+            log.info(f"\nSpreadsheet URL: {spreadsheet_url}")
         else:
-            print("\nStep 5: Skipping Google Sheets (not configured)")
-            print(f"\n{'='*60}")
-            print(f"✓ PDF processing complete! (Data cached locally)")
-            print(f"{'='*60}")
+            log.info("\nStep 5: Skipping Google Sheets (not configured)")
+            log.info(f"\n{'='*60}")
+            log.info(f"✓ PDF processing complete! (Data cached locally)")
+            log.info(f"{'='*60}")
         
         # Show context summary
         context = self.data_processor.get_context_summary()
-        print(f"\nContext Summary:")
-        print(f"  - Total files processed: {context['processed_files_count']}")
-        print(f"  - Total chapters: {context['chapters_count']}")
-        print(f"  - Current session number: {context['current_session']}")
+        log.info(f"\nContext Summary:")
+        log.info(f"  - Total files processed: {context['processed_files_count']}")
+        log.info(f"  - Total chapters: {context['chapters_count']}")
+        log.info(f"  - Current session number: {context['current_session']}")
         
         return result
     
+    def _create_spreadsheet(self, title: str) -> str:
+        """
+        Create a spreadsheet and set up its headers
+        
+        Args:
+            title: Title of the spreadsheet
+            
+        Returns:
+            Spreadsheet ID
+        """
+        spreadsheet_id = self.sheets_writer.create_spreadsheet(title)
+        self.sheets_writer.setup_headers(spreadsheet_id)
+        return spreadsheet_id
+    
     def process_multiple_pdfs(self, pdf_paths: list, spreadsheet_title: str = "Unit Management Table") -> dict:
         """
         Process multiple PDF files into a single spreadsheet
@@ -166,24 +240,56 @@ class UnitManagementTableCreator:
         if not pdf_paths:
             raise ValueError("No PDF files provided")
         
-        print(f"\n{'='*60}")
-        print(f"Processing {len(pdf_paths)} PDF files")
-        print(f"{'='*60}\n")
+        log.info(f"\n{'='*60}")
+        log.info(f"Processing {len(pdf_paths)} PDF files")
+        log.info(f"{'='*60}\n")
         
-        # Create spreadsheet first
+        # Validate all PDFs exist before starting background work
+        for pdf_path in pdf_paths:
+            if not os.path.exists(pdf_path):
+                raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        all_rows = []
         spreadsheet_id = None
-        if self._init_sheets_writer():
-            print(f"Creating spreadsheet: {spreadsheet_title}")
-            spreadsheet_id = self.sheets_writer.create_spreadsheet(spreadsheet_title)
-            self.sheets_writer.setup_headers(spreadsheet_id)
-            print(f"✓ Spreadsheet created: {spreadsheet_id}\n")
+        # Spreadsheet setup and extraction each get a single thread: every
+        # extraction already fans out to a process pool, so running two at
+        # once would only oversubscribe the CPU
+        with ThreadPoolExecutor(max_workers=1) as setup_executor, \
+                ThreadPoolExecutor(max_workers=1) as extract_executor:
+            # Create the spreadsheet while the PDFs are being extracted
+            setup_future = None
+            if self._init_sheets_writer():
+                log.info(f"Creating spreadsheet: {spreadsheet_title}")
+                setup_future = setup_executor.submit(self._create_spreadsheet, spreadsheet_title)
+            
+            # Extraction runs one PDF ahead; rows are built in order since
+            # the data processor's session context is sequential. Only the
+            # PDF being processed and the one being extracted are held.
+            pending = deque([extract_executor.submit(self.pdf_processor.extract_text_from_pdf,
+                                                     pdf_paths[0])])
+            
+            # Process each PDF, collecting rows for a single write at the end.
+            # The progress bar stands in for the per-step log when it is silenced.
+            progress = pdf_paths
+            if tqdm is not None:
+                progress = tqdm(progress, unit='pdf', disable=log.isEnabledFor(logging.INFO))
+            for i, pdf_path in enumerate(progress, 1):
+                if i < len(pdf_paths):
+                    pending.append(extract_executor.submit(self.pdf_processor.extract_text_from_pdf,
+                                                           pdf_paths[i]))
+                log.info(f"\n[{i}/{len(pdf_paths)}] Processing: {pdf_path}")
+                _, _, rows = self._build_rows(pdf_path, extracted_data=pending.popleft().result())
+                all_rows.extend(rows)
+            
+            if setup_future:
+                spreadsheet_id = setup_future.result()
+                log.info(f"\n✓ Spreadsheet created: {spreadsheet_id}")
         
-        # Process each PDF
-        total_rows = 0
-        for i, pdf_path in enumerate(pdf_paths, 1):
-            print(f"\n[{i}/{len(pdf_paths)}] Processing: {pdf_path}")
-            result = self.process_pdf(pdf_path, spreadsheet_id=spreadsheet_id)
-            total_rows += result['rows_created']
+        total_rows = len(all_rows)
+        if spreadsheet_id and all_rows:
+            log.info(f"\nWriting {total_rows} rows to Google Sheets...")
+            self._write_rows(spreadsheet_id, all_rows)
+            log.info(f"✓ Written {total_rows} rows")
         
         result = {
             'pdf_files': pdf_paths,
@@ -193,13 +299,13 @@ class UnitManagementTableCreator:
             'spreadsheet_url': self.sheets_writer.get_spreadsheet_url(spreadsheet_id) if spreadsheet_id else None
         }
         
-        print(f"\n{'='*60}")
-        print(f"✓ All PDFs processed!")
-        print(f"{'='*60}")
-        print(f"Total PDFs: {len(pdf_paths)}")
-        print(f"Total rows: {total_rows}")
+        log.info(f"\n{'='*60}")
+        log.info(f"✓ All PDFs processed!")
+        log.info(f"{'='*60}")
+        log.info(f"Total PDFs: {len(pdf_paths)}")
+        log.info(f"Total rows: {total_rows}")
         if result['spreadsheet_url']:
-            print(f"Spreadsheet: {result['spreadsheet_url']}")
+            log.info(f"Spreadsheet: {result['spreadsheet_url']}")
         
         return result
 
@@ -245,25 +351,73 @@ def main():
         help='Disable caching and force re-extraction'
     )
     
+    parser.add_argument(
+        '--cache-format',
+        choices=['json', 'msgpack'],
+        default='json',
+        help='Serialization format for the extraction cache (default: "json")'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Number of processes for PDF page extraction (default: CPU count)'
+    )
+    
+    parser.add_argument(
+        '--with-images',
+        action='store_true',
+        help='Decode embedded images during extraction (slower; only sizes are recorded otherwise)'
+    )
+    
+    parser.add_argument(
+        '--gzip-requests',
+        action='store_true',
+        help='Gzip-compress large Google Sheets request bodies (experimental)'
+    )
+    
     parser.add_argument(
         '--reset-context',
         action='store_true',
         help='Reset processing context (session counter, etc.)'
     )
     
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Only show warnings and errors (with a progress bar for multiple PDFs)'
+    )
+    
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Show detailed output, including every detected chapter'
+    )
+    
     args = parser.parse_args()
     
+    # Plain messages on stdout, gated by level
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+    log.setLevel(logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO)
+    
     # Create creator
     creator = UnitManagementTableCreator(
         cache_dir=args.cache_dir,
-        credentials_path=args.credentials
+        credentials_path=args.credentials,
+        max_workers=args.workers,
+        cache_format=args.cache_format,
+        extract_images=args.with_images,
+        gzip_requests=args.gzip_requests
     )
     
     # Reset context if requested
     if args.reset_context:
-        print("Resetting processing context...")
+        log.info("Resetting processing context...")
         creator.data_processor.reset_context()
-        print("✓ Context reset\n")
+        log.info("✓ Context reset\n")
     
     try:
         # Process PDFs
@@ -281,9 +435,7 @@ def main():
             )
     
     except Exception as e:
-        print(f"\n❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception(f"\n❌ Error: {e}")
         sys.exit(1)
 
 
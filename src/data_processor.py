@@ -3,10 +3,17 @@ Data Processor Module
 Handles contextual processing and data transformation between PDF extraction and spreadsheet writing
 """
 
-from typing import List, Dict, Optional
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional, Tuple
 import os
+import re
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class DataProcessor:
     """
@@ -18,6 +25,15 @@ class DataProcessor:
     MIN_SUBTOPIC_LENGTH = 5
     MAX_SUBTOPIC_LENGTH = 100
     
+    # Keyword patterns selecting the relevant line from a metadata page
+    # (lowercase; matched against lowercased text)
+    LEARNING_GOAL_PATTERN = re.compile(r'goal|목표')
+    HOMEWORK_PATTERN = re.compile(r'homework|숙제|과제|practice')
+    CHECK_TEST_PATTERN = re.compile(r'question|review|문제|복습')
+    
+    # Metadata sections indexed by page for per-chapter range lookups
+    METADATA_KEYS = ('learning_goals', 'homework_tasks', 'review_questions')
+    
     def __init__(self, cache_dir: str = "cache"):
         """
         Initialize data processor
@@ -28,12 +44,16 @@ class DataProcessor:
         self.cache_dir = cache_dir
         self.context_file = os.path.join(cache_dir, "document_context.json")
         self.context = self._load_context()
+        self._rebuild_context_index()
     
     def _load_context(self) -> Dict:
         """Load persistent context from previous processing"""
-        if os.path.exists(self.context_file):
-            with open(self.context_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        try:
+            with open(self.context_file, 'rb') as f:
+                raw = f.read()
+            return orjson.loads(raw) if orjson else json.loads(raw)
+        except FileNotFoundError:
+            pass
         return {
             'processed_files': [],
             'chapters': [],
@@ -41,11 +61,20 @@ class DataProcessor:
             'session_counter': 0
         }
     
+    def _rebuild_context_index(self):
+        """Mirror context lists into sets for constant-time membership checks"""
+        self._processed_files = set(self.context['processed_files'])
+        self._chapter_titles = {chapter['title'] for chapter in self.context['chapters']}
+    
     def _save_context(self):
         """Save context for future processing"""
         os.makedirs(os.path.dirname(self.context_file), exist_ok=True)
-        with open(self.context_file, 'w', encoding='utf-8') as f:
-            json.dump(self.context, f, ensure_ascii=False, indent=2)
+        if orjson:
+            with open(self.context_file, 'wb') as f:
+                f.write(orjson.dumps(self.context))
+        else:
+            with open(self.context_file, 'w', encoding='utf-8') as f:
+                json.dump(self.context, f, ensure_ascii=False)
     
     def process_pdf_data(self, extracted_data: Dict, chapters: List[Dict], 
                         metadata: Dict) -> List[List]:
@@ -64,34 +93,39 @@ class DataProcessor:
         
         # Update context with current file
         file_name = extracted_data['file_name']
-        if file_name not in self.context['processed_files']:
+        if file_name not in self._processed_files:
+            self._processed_files.add(file_name)
             self.context['processed_files'].append(file_name)
         
+        # Sort metadata by page once so each chapter is a range lookup
+        page_index = self._build_page_index(metadata)
+        
         # Process each chapter
-        for chapter in chapters:
+        for i, chapter in enumerate(chapters):
             self.context['session_counter'] += 1
+            title = chapter.get('title', '')
             
             # Determine if this is a continuation of previous chapter
             is_continuation = self._is_chapter_continuation(chapter)
             
             # Extract page range
-            page_range = self._extract_page_range(chapter, extracted_data)
+            start_page, end_page = self._extract_page_range(chapters, i, extracted_data)
             
             # Extract learning goals
-            learning_goals = self._extract_learning_goals(chapter, metadata)
+            learning_goals = self._extract_learning_goals(page_index, start_page, end_page)
             
             # Extract homework
-            homework = self._extract_homework(chapter, metadata)
+            homework = self._extract_homework(page_index, start_page, end_page)
             
             # Extract check test questions
-            check_test = self._extract_check_test(chapter, metadata)
+            check_test = self._extract_check_test(page_index, start_page, end_page)
             
             # Create row
             row = [
                 str(self.context['session_counter']),  # Session number
-                chapter.get('title', ''),  # Major Unit
+                title,  # Major Unit
                 self._extract_subtopic(chapter),  # Subtopic/Theme
-                page_range,  # Page Range
+                f"{start_page}-{end_page}",  # Page Range
                 learning_goals,  # Learning Goals
                 homework,  # Homework
                 check_test,  # Check Test
@@ -102,10 +136,11 @@ class DataProcessor:
             rows.append(row)
             
             # Update context
-            self.context['current_chapter'] = chapter.get('title', '')
-            if chapter not in self.context['chapters']:
+            self.context['current_chapter'] = title
+            if title not in self._chapter_titles:
+                self._chapter_titles.add(title)
                 self.context['chapters'].append({
-                    'title': chapter.get('title', ''),
+                    'title': title,
                     'session': self.context['session_counter']
                 })
         
@@ -140,26 +175,51 @@ class DataProcessor:
         
         return False
     
-    def _extract_page_range(self, chapter: Dict, extracted_data: Dict) -> str:
+    def _extract_page_range(self, chapters: List[Dict], index: int,
+                            extracted_data: Dict) -> Tuple[int, int]:
         """
         Extract page range for a chapter
         
         Args:
-            chapter: Chapter data
+            chapters: All chapters of the document
+            index: Position of the chapter in chapters
             extracted_data: Full PDF extraction data
             
         Returns:
-            Page range string (e.g., "10-15")
+            Inclusive (start_page, end_page) tuple
         """
-        start_page = chapter.get('start_page', 1)
+        start_page = chapters[index].get('start_page', 1)
         
-        # Find end page (either next chapter or last page)
-        end_page = extracted_data['total_pages']
+        # Find end page (either the page before the next chapter or last page)
+        if index + 1 < len(chapters):
+            next_start = chapters[index + 1].get('start_page', start_page)
+            end_page = max(start_page, next_start - 1)
+        else:
+            end_page = extracted_data['total_pages']
         
-        # In a real implementation, you'd find the next chapter's start
-        # For now, estimate based on content
+        return start_page, end_page
+    
+    def _build_page_index(self, metadata: Dict) -> Dict[str, Tuple[List[int], List[Dict]]]:
+        """
+        Sort each metadata section by page for range queries
         
-        return f"{start_page}-{end_page}"
+        Args:
+            metadata: Extracted metadata
+            
+        Returns:
+            Mapping of section name to (sorted pages, entries in the same order)
+        """
+        page_index = {}
+        for key in self.METADATA_KEYS:
+            entries = sorted(metadata.get(key, []), key=lambda entry: entry['page'])
+            page_index[key] = ([entry['page'] for entry in entries], entries)
+        return page_index
+    
+    def _entries_in_range(self, page_index: Dict, key: str,
+                          start_page: int, end_page: int) -> List[Dict]:
+        """Get the metadata entries of a section within an inclusive page range"""
+        pages, entries = page_index[key]
+        return entries[bisect_left(pages, start_page):bisect_right(pages, end_page)]
     
     def _extract_subtopic(self, chapter: Dict) -> str:
         """
@@ -181,81 +241,95 @@ class DataProcessor:
         
         return ""
     
-    def _extract_learning_goals(self, chapter: Dict, metadata: Dict) -> str:
+    def _first_matching_line(self, text: str, pattern: re.Pattern) -> Optional[str]:
+        """
+        Find the first line of text containing a keyword
+        
+        Args:
+            text: Page text
+            pattern: Compiled lowercase keyword pattern
+            
+        Returns:
+            The stripped matching line, or None if no keyword occurs
+        """
+        # Search the whole page once, then cut out the surrounding line.
+        # A case-sensitive search of the lowercased page is several times
+        # faster than re.IGNORECASE; offsets carry over unless lower()
+        # expanded a character, in which case search case-insensitively.
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            match = pattern.search(lowered)
+        else:
+            match = re.search(pattern.pattern, text, re.IGNORECASE)
+        if match is None:
+            return None
+        
+        start = text.rfind('\n', 0, match.start()) + 1
+        end = text.find('\n', match.end())
+        return text[start:end if end != -1 else len(text)].strip()
+    
+    def _extract_learning_goals(self, page_index: Dict, start_page: int, end_page: int) -> str:
         """
         Extract learning goals from chapter
         
         Args:
-            chapter: Chapter data
-            metadata: Extracted metadata
+            page_index: Metadata index from _build_page_index
+            start_page: First page of the chapter
+            end_page: Last page of the chapter
             
         Returns:
             Learning goals string
         """
         # Look for learning goals in metadata that match this chapter's pages
-        start_page = chapter.get('start_page', 0)
         goals = []
         
-        for goal_data in metadata.get('learning_goals', []):
-            if goal_data['page'] >= start_page:
-                # Extract relevant text
-                text = goal_data['text']
-                # Simple extraction - take first relevant line
-                lines = text.split('\n')
-                for line in lines:
-                    if 'goal' in line.lower() or '목표' in line:
-                        goals.append(line.strip())
-                        break
+        for goal_data in self._entries_in_range(page_index, 'learning_goals', start_page, end_page):
+            # Simple extraction - take first relevant line
+            line = self._first_matching_line(goal_data['text'], self.LEARNING_GOAL_PATTERN)
+            if line is not None:
+                goals.append(line)
         
         return ' | '.join(goals) if goals else ""
     
-    def _extract_homework(self, chapter: Dict, metadata: Dict) -> str:
+    def _extract_homework(self, page_index: Dict, start_page: int, end_page: int) -> str:
         """
         Extract homework tasks from chapter
         
         Args:
-            chapter: Chapter data
-            metadata: Extracted metadata
+            page_index: Metadata index from _build_page_index
+            start_page: First page of the chapter
+            end_page: Last page of the chapter
             
         Returns:
             Homework string
         """
-        start_page = chapter.get('start_page', 0)
         homework = []
         
-        for hw_data in metadata.get('homework_tasks', []):
-            if hw_data['page'] >= start_page:
-                text = hw_data['text']
-                lines = text.split('\n')
-                for line in lines:
-                    if any(keyword in line.lower() for keyword in ['homework', '숙제', '과제', 'practice']):
-                        homework.append(line.strip())
-                        break
+        for hw_data in self._entries_in_range(page_index, 'homework_tasks', start_page, end_page):
+            line = self._first_matching_line(hw_data['text'], self.HOMEWORK_PATTERN)
+            if line is not None:
+                homework.append(line)
         
         return ' | '.join(homework) if homework else ""
     
-    def _extract_check_test(self, chapter: Dict, metadata: Dict) -> str:
+    def _extract_check_test(self, page_index: Dict, start_page: int, end_page: int) -> str:
         """
         Extract check test questions from chapter
         
         Args:
-            chapter: Chapter data
-            metadata: Extracted metadata
+            page_index: Metadata index from _build_page_index
+            start_page: First page of the chapter
+            end_page: Last page of the chapter
             
         Returns:
             Check test string
         """
-        start_page = chapter.get('start_page', 0)
         questions = []
         
-        for question_data in metadata.get('review_questions', []):
-            if question_data['page'] >= start_page:
-                text = question_data['text']
-                lines = text.split('\n')
-                for line in lines:
-                    if any(keyword in line.lower() for keyword in ['question', 'review', '문제', '복습']):
-                        questions.append(line.strip())
-                        break
+        for question_data in self._entries_in_range(page_index, 'review_questions', start_page, end_page):
+            line = self._first_matching_line(question_data['text'], self.CHECK_TEST_PATTERN)
+            if line is not None:
+                questions.append(line)
         
         return ' | '.join(questions) if questions else ""
     
@@ -267,6 +341,7 @@ class DataProcessor:
             'current_chapter': None,
             'session_counter': 0
         }
+        self._rebuild_context_index()
         self._save_context()
     
     def get_context_summary(self) -> Dict:
@@ -7,63 +7,305 @@ import os
 import json
 import hashlib
 import io
-from typing import Dict, List, Optional, Tuple
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+
+def _pool_context():
+    """
+    Get the multiprocessing context for the page extraction pool
+    
+    The platform default (fork on Linux) does not re-import the calling
+    script, but forking is only safe while no other thread is running.
+    When one is (e.g. spreadsheet setup in main.py), workers are started
+    from a fork server instead.
+    """
+    if threading.active_count() > 1 and 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return None
+
+
+@contextmanager
+def _document(pdf_path: str, doc: Optional[fitz.Document] = None) -> Iterator[fitz.Document]:
+    """Yield doc if one is given, otherwise open pdf_path and close it afterwards"""
+    if doc is not None:
+        yield doc
+        return
+    
+    doc = fitz.open(pdf_path)
+    try:
+        yield doc
+    finally:
+        doc.close()
+
+
+@lru_cache(maxsize=32)
+def _read_pdf_identity(pdf_path: str, size: int, mtime_ns: int) -> Tuple[Optional[str], int]:
+    """
+    Read a PDF's trailer /ID and page count with a single open
+    
+    Size and mtime are only part of the memo key, so a modified file is
+    read again while repeated lookups for the same file are free.
+    
+    Returns:
+        Tuple of (SHA-1 hex digest of the /ID array or None if absent, page count)
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        pdf_id = None
+        if doc.is_pdf:
+            kind, value = doc.xref_get_key(-1, 'ID')  # -1 is the trailer
+            if kind == 'array':
+                # Hash the raw value: /ID strings may be literal (...) rather than hex <...>
+                pdf_id = hashlib.sha1(value.encode('utf-8', 'surrogatepass')).hexdigest()
+        return pdf_id, doc.page_count
+    finally:
+        doc.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int,
+                        extract_images: bool = False,
+                        doc: Optional[fitz.Document] = None) -> List[Dict]:
+    """
+    Extract text and image info for pages [start, end) of a PDF
+    
+    Defined at module level so it can run in worker processes; each call
+    opens its own document handle since fitz.Document cannot be shared
+    across processes. In-process callers may pass an already open doc.
+    Images are only decoded when extract_images is set; otherwise their
+    size is read from the page's image metadata.
+    """
+    pages_data = []
+    
+    with _document(pdf_path, doc) as doc:
+        for page_num in range(start, end):
+            page = doc[page_num]
+            
+            # Build MuPDF's text structure once and read both views from it
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+            text = textpage.extractText()
+            blocks = textpage.extractDICT()['blocks']
+            
+            # Extract images from page for potential OCR
+            images = []
+            if extract_images:
+                image_list = page.get_images()
+                
+                for img_index, img in enumerate(image_list):
+                    xref = img[0]
+                    base_image = doc.extract_image(xref)
+                    images.append({
+                        'index': img_index,
+                        'width': base_image['width'],
+                        'height': base_image['height'],
+                        'ext': base_image['ext']
+                    })
+            else:
+                for img_index, info in enumerate(page.get_image_info(hashes=False)):
+                    images.append({
+                        'index': img_index,
+                        'width': info['width'],
+                        'height': info['height']
+                    })
+            
+            pages_data.append({
+                'page_number': page_num + 1,
+                'text': text,
+                'images': images,
+                '_analysis': PDFProcessor._analyze_page(text, blocks)
+            })
+    
+    return pages_data
+
 
 class PDFProcessor:
     """
     Process PDF files to extract text, images, and structured data
     """
     
-    def __init__(self, cache_dir: str = "cache"):
+    # Documents shorter than this are extracted in-process; pool startup
+    # would cost more than it saves
+    PARALLEL_PAGE_THRESHOLD = 32
+    
+    # Chapter content is only used to pick a subtopic from its first lines,
+    # so only this many non-empty lines are kept per chapter
+    MAX_CHAPTER_CONTENT_LINES = 10
+    
+    # Line prefixes marking chapter headings ('제' and '단원' are the Korean
+    # chapter and unit markers)
+    CHAPTER_PREFIXES = ('Chapter', '제', '단원')
+    
+    # Keywords marking metadata sections (matched against lowercased page text)
+    LEARNING_GOAL_KEYWORDS = ('learning goal', '학습 목표')
+    HOMEWORK_KEYWORDS = ('homework', '숙제', '과제')
+    REVIEW_KEYWORDS = ('review', 'question', '복습', '문제')
+    
+    # Supported cache formats and their file extensions
+    CACHE_FORMATS = {
+        'json': '.json',
+        'msgpack': '.mpk',
+    }
+    
+    def __init__(self, cache_dir: str = "cache", max_workers: Optional[int] = None,
+                 cache_format: str = "json", extract_images: bool = False):
         """
         Initialize PDF processor
         
         Args:
             cache_dir: Directory to store cached extraction results
+            max_workers: Number of worker processes for page extraction
+                (defaults to the CPU count). Documents of PARALLEL_PAGE_THRESHOLD
+                pages or more use a process pool. Where workers are not forked
+                (macOS and Windows, or when other threads are running) they
+                re-import the calling script, so scripts should keep their
+                top-level work under `if __name__ == '__main__':`. Without the
+                guard the pool fails and extraction falls back to a single
+                process; pass max_workers=1 to skip the pool.
+            cache_format: Serialization format for cached results ('json' or 'msgpack')
+            extract_images: Whether to decode every image during extraction
+                (otherwise only image sizes are recorded)
         """
+        if cache_format not in self.CACHE_FORMATS:
+            raise ValueError(f"Unsupported cache format: {cache_format}")
+        if cache_format == 'msgpack' and msgpack is None:
+            raise ImportError("The 'msgpack' cache format requires the msgpack package")
+        
         self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_format = cache_format
+        self.extract_images = extract_images
         os.makedirs(cache_dir, exist_ok=True)
     
-    def _get_cache_key(self, pdf_path: str) -> str:
-        """Generate a unique cache key for a PDF file"""
-        with open(pdf_path, 'rb') as f:
-            file_hash = hashlib.sha256(f.read()).hexdigest()
-        return f"{os.path.basename(pdf_path)}_{file_hash}"
+    @contextmanager
+    def open_document(self, pdf_path: str) -> Iterator[fitz.Document]:
+        """
+        Open a PDF once for several extraction calls
+        
+        The yielded document can be passed as doc= to extract_text_from_pdf
+        and extract_image_with_ocr, and is closed when the block exits.
+        
+        Args:
+            pdf_path: Path to the PDF file
+        """
+        with _document(pdf_path) as doc:
+            yield doc
+    
+    def _inspect_pdf(self, pdf_path: str) -> Tuple[Optional[str], int, os.stat_result]:
+        """
+        Get the /ID, page count and file status of a PDF
+        
+        Args:
+            pdf_path: Path to the PDF file
+            
+        Returns:
+            Tuple of (trailer /ID or None, page count, os.stat result)
+        """
+        stat = os.stat(pdf_path)
+        pdf_id, n_pages = _read_pdf_identity(pdf_path, stat.st_size, stat.st_mtime_ns)
+        return pdf_id, n_pages, stat
+    
+    def _get_cache_key(self, pdf_path: str, extract_images: bool = False) -> str:
+        """
+        Generate a cache key for a PDF file
+        
+        Uses the producer-written trailer /ID (plus file size, in case an
+        editor kept the ID), so copies and touched files still hit the
+        cache. Falls back to size and mtime for files without an /ID.
+        """
+        pdf_id, _, stat = self._inspect_pdf(pdf_path)
+        if pdf_id:
+            fingerprint = f"{pdf_id}_{stat.st_size}"
+        else:
+            fingerprint = f"{stat.st_size}_{stat.st_mtime_ns}"
+        suffix = "_images" if extract_images else ""
+        return f"{os.path.basename(pdf_path)}_{fingerprint}{suffix}"
     
-    def _get_cache_path(self, cache_key: str) -> str:
+    def _get_cache_path(self, cache_key: str, cache_format: Optional[str] = None) -> str:
         """Get the full path to the cache file"""
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
+        extension = self.CACHE_FORMATS[cache_format or self.cache_format]
+        return os.path.join(self.cache_dir, f"{cache_key}{extension}")
+    
+    def _read_cache_file(self, cache_path: str, cache_format: str) -> Dict:
+        """Deserialize a cache file in the given format"""
+        with open(cache_path, 'rb') as f:
+            raw = f.read()
+        if cache_format == 'msgpack':
+            return msgpack.unpackb(raw, raw=False, strict_map_key=False)
+        return orjson.loads(raw) if orjson else json.loads(raw)
     
     def _load_from_cache(self, cache_key: str) -> Optional[Dict]:
         """Load extracted data from cache"""
-        cache_path = self._get_cache_path(cache_key)
-        if os.path.exists(cache_path):
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        try:
+            return self._read_cache_file(self._get_cache_path(cache_key), self.cache_format)
+        except FileNotFoundError:
+            pass
+        
+        # Migrate a JSON cache entry written before msgpack was enabled
+        if self.cache_format != 'json':
+            json_path = self._get_cache_path(cache_key, 'json')
+            try:
+                data = self._read_cache_file(json_path, 'json')
+            except FileNotFoundError:
+                return None
+            self._save_to_cache(cache_key, data)
+            os.remove(json_path)
+            return data
         return None
     
     def _save_to_cache(self, cache_key: str, data: Dict):
         """Save extracted data to cache"""
         cache_path = self._get_cache_path(cache_key)
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if self.cache_format == 'msgpack':
+            with open(cache_path, 'wb') as f:
+                f.write(msgpack.packb(data, use_bin_type=True))
+        elif orjson:
+            with open(cache_path, 'wb') as f:
+                f.write(orjson.dumps(data))
+        else:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
     
-    def extract_text_from_pdf(self, pdf_path: str, use_cache: bool = True) -> Dict:
+    def extract_text_from_pdf(self, pdf_path: str, use_cache: bool = True,
+                              extract_images: Optional[bool] = None,
+                              doc: Optional[fitz.Document] = None) -> Dict:
         """
         Extract text content from PDF file
         
         Args:
             pdf_path: Path to the PDF file
             use_cache: Whether to use cached results if available
+            extract_images: Whether to decode every image (defaults to the
+                processor's extract_images setting)
+            doc: Already open document from open_document (optional; only
+                used when pages are extracted in-process)
             
         Returns:
             Dictionary containing extracted text and metadata
         """
-        cache_key = self._get_cache_key(pdf_path)
+        if extract_images is None:
+            extract_images = self.extract_images
+        
+        cache_key = self._get_cache_key(pdf_path, extract_images)
         
         # Check cache first
         if use_cache:
@@ -72,34 +314,7 @@ class PDFProcessor:
                 return cached_data
         
         # Extract text from PDF
-        doc = fitz.open(pdf_path)
-        pages_data = []
-        
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
-            
-            # Extract images from page for potential OCR
-            images = []
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                images.append({
-                    'index': img_index,
-                    'width': base_image['width'],
-                    'height': base_image['height'],
-                    'ext': base_image['ext']
-                })
-            
-            pages_data.append({
-                'page_number': page_num + 1,
-                'text': text,
-                'images': images
-            })
-        
-        doc.close()
+        pages_data = self._extract_pages(pdf_path, extract_images, doc)
         
         result = {
             'file_path': pdf_path,
@@ -114,7 +329,44 @@ class PDFProcessor:
         
         return result
     
-    def extract_image_with_ocr(self, pdf_path: str, page_num: int, img_index: int) -> str:
+    def _extract_pages(self, pdf_path: str, extract_images: bool = False,
+                       doc: Optional[fitz.Document] = None) -> List[Dict]:
+        """
+        Extract all pages, splitting the work across a process pool
+        
+        Args:
+            pdf_path: Path to the PDF file
+            extract_images: Whether to decode every image
+            doc: Already open document to use for in-process extraction
+            
+        Returns:
+            List of page dictionaries sorted by page number
+        """
+        _, n_pages, _ = self._inspect_pdf(pdf_path)
+        
+        workers = min(self.max_workers, n_pages)
+        if workers <= 1 or n_pages < self.PARALLEL_PAGE_THRESHOLD:
+            return _extract_page_range(pdf_path, 0, n_pages, extract_images, doc)
+        
+        chunk = -(-n_pages // workers)  # ceiling division
+        starts = list(range(0, n_pages, chunk))
+        ends = [min(start + chunk, n_pages) for start in starts]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as executor:
+                results = executor.map(_extract_page_range, repeat(pdf_path), starts, ends,
+                                       repeat(extract_images))
+                pages_data = [page for chunk_pages in results for page in chunk_pages]
+        except BrokenProcessPool:
+            # Workers die on startup when the calling script re-runs its
+            # top-level code without an `if __name__ == '__main__':` guard
+            return _extract_page_range(pdf_path, 0, n_pages, extract_images, doc)
+        
+        pages_data.sort(key=lambda page: page['page_number'])
+        return pages_data
+    
+    def extract_image_with_ocr(self, pdf_path: str, page_num: int, img_index: int,
+                               doc: Optional[fitz.Document] = None) -> str:
         """
         Extract a specific image from PDF and perform OCR
         
@@ -122,30 +374,70 @@ class PDFProcessor:
             pdf_path: Path to the PDF file
             page_num: Page number (1-indexed)
             img_index: Image index on the page
+            doc: Already open document from open_document (optional)
             
         Returns:
             Extracted text from image
         """
-        doc = fitz.open(pdf_path)
-        page = doc[page_num - 1]
-        image_list = page.get_images()
-        
-        if img_index >= len(image_list):
-            doc.close()
-            return ""
-        
-        xref = image_list[img_index][0]
-        base_image = doc.extract_image(xref)
-        image_bytes = base_image["image"]
+        with _document(pdf_path, doc) as doc:
+            page = doc[page_num - 1]
+            image_list = page.get_images()
+            
+            if img_index >= len(image_list):
+                return ""
+            
+            xref = image_list[img_index][0]
+            base_image = doc.extract_image(xref)
+            image_bytes = base_image["image"]
         
         # Convert to PIL Image
         image = Image.open(io.BytesIO(image_bytes))
         
         # Perform OCR
-        text = pytesseract.image_to_string(image, lang='kor+eng')
+        return pytesseract.image_to_string(image, lang='kor+eng')
+    
+    @staticmethod
+    def _analyze_page(page_text: str, blocks: Optional[List[Dict]] = None) -> Dict:
+        """
+        Analyze a page's text once for the chapter and metadata heuristics
         
-        doc.close()
-        return text
+        Args:
+            page_text: Raw text of the page
+            blocks: Blocks of the page as returned by TextPage.extractDICT
+                (optional; headings are searched line by line without them)
+            
+        Returns:
+            Dictionary with the chapter headings and section flags of the page.
+            The lines are not included: the analysis is cached next to the
+            text, and they are rebuilt from it with _page_lines.
+        """
+        lowered = page_text.lower()
+        
+        if blocks is None:
+            headings = [line for line in PDFProcessor._page_lines(page_text)
+                        if PDFProcessor._is_chapter_heading(line)]
+        else:
+            headings = PDFProcessor._headings_from_blocks(blocks)
+        
+        return {
+            'headings': headings,
+            'is_chapter_candidate': bool(headings),
+            'has_learning_goal': any(k in lowered for k in PDFProcessor.LEARNING_GOAL_KEYWORDS),
+            'has_homework': any(k in lowered for k in PDFProcessor.HOMEWORK_KEYWORDS),
+            'has_review': any(k in lowered for k in PDFProcessor.REVIEW_KEYWORDS)
+        }
+    
+    @staticmethod
+    def _page_lines(page_text: str) -> List[str]:
+        """Split page text into stripped lines"""
+        return [line.strip() for line in page_text.split('\n')]
+    
+    def _get_analysis(self, page: Dict) -> Dict:
+        """Get the page analysis, computing it for pages cached without one"""
+        analysis = page.get('_analysis')
+        if analysis is None or 'headings' not in analysis:
+            analysis = self._analyze_page(page['text'])
+        return analysis
     
     def extract_chapter_structure(self, extracted_data: Dict) -> List[Dict]:
         """
@@ -161,15 +453,18 @@ class PDFProcessor:
         current_chapter = None
         
         for page in extracted_data['pages']:
-            text = page['text']
-            lines = text.split('\n')
+            analysis = self._get_analysis(page)
             
-            for line in lines:
-                line = line.strip()
-                
-                # Heuristic: Look for chapter markers
-                # This can be customized based on actual PDF structure
-                if self._is_chapter_heading(line):
+            # Pages without any heading only extend the current chapter
+            if not analysis['is_chapter_candidate']:
+                if current_chapter and len(current_chapter['content']) < self.MAX_CHAPTER_CONTENT_LINES:
+                    self._add_chapter_content(current_chapter, self._page_lines(page['text']))
+                continue
+            
+            headings = set(analysis['headings'])
+            for line in self._page_lines(page['text']):
+                # Chapter markers were found by _analyze_page
+                if line in headings:
                     if current_chapter:
                         chapters.append(current_chapter)
                     
@@ -179,7 +474,7 @@ class PDFProcessor:
                         'content': []
                     }
                 elif current_chapter:
-                    current_chapter['content'].append(line)
+                    self._add_chapter_content(current_chapter, (line,))
         
         # Add the last chapter
         if current_chapter:
@@ -187,21 +482,65 @@ class PDFProcessor:
         
         return chapters
     
-    def _is_chapter_heading(self, line: str) -> bool:
+    def _add_chapter_content(self, chapter: Dict, lines: Iterable[str]) -> None:
+        """Append non-empty lines to a chapter until its content is full"""
+        content = chapter['content']
+        for line in lines:
+            if len(content) >= self.MAX_CHAPTER_CONTENT_LINES:
+                break
+            if line:
+                content.append(line)
+    
+    @staticmethod
+    def _headings_from_blocks(blocks: List[Dict]) -> List[str]:
         """
-        Determine if a line is a chapter heading
+        Find the chapter headings among a page's text blocks
+        
+        Only the first line of a block can be a heading, and only if no
+        other line on the page shares its row. MuPDF groups the cells of a
+        table row, or text placed side by side, into one block as separate
+        lines, so this is checked on line bounding boxes: two lines share a
+        row when either one's vertical center lies inside the other.
         
-        This is a heuristic that can be customized based on the PDF structure
+        Args:
+            blocks: Blocks from TextPage.extractDICT
+            
+        Returns:
+            Heading lines in reading order
         """
-        # Common patterns for chapter headings
-        patterns = [
-            line.startswith('Chapter'),
-            line.startswith('제'),  # Korean chapter marker
-            line.startswith('단원'),  # Korean unit marker
-            (len(line) < 50 and line.isupper()),  # Short uppercase lines
+        lines = [
+            (line['bbox'][1], line['bbox'][3], index == 0,
+             ''.join(span['text'] for span in line['spans']).strip())
+            for block in blocks if block['type'] == 0
+            for index, line in enumerate(block['lines'])
         ]
         
-        return any(patterns)
+        headings = []
+        for i, (y0, y1, opens_block, text) in enumerate(lines):
+            if not opens_block or not PDFProcessor._is_chapter_heading(text):
+                continue
+            
+            center = (y0 + y1) / 2
+            shares_row = any(
+                j != i and (other_y0 < center < other_y1 or y0 < (other_y0 + other_y1) / 2 < y1)
+                for j, (other_y0, other_y1, _, _) in enumerate(lines)
+            )
+            if not shares_row:
+                headings.append(text)
+        return headings
+    
+    @staticmethod
+    def _is_chapter_heading(line: str) -> bool:
+        """
+        Determine if a line is a chapter heading
+        
+        This is a heuristic that can be customized based on the PDF structure.
+        It is kept on str methods rather than a compiled regex: the tuple
+        startswith is faster per line, and a regex cannot reproduce
+        isupper() for non-ASCII text.
+        """
+        # Common patterns for chapter headings, then short uppercase lines
+        return line.startswith(PDFProcessor.CHAPTER_PREFIXES) or (len(line) < 50 and line.isupper())
     
     def extract_metadata(self, extracted_data: Dict) -> Dict:
         """
@@ -220,27 +559,22 @@ class PDFProcessor:
         }
         
         for page in extracted_data['pages']:
-            text = page['text'].lower()
+            analysis = self._get_analysis(page)
+            entry = {
+                'page': page['page_number'],
+                'text': page['text']
+            }
             
             # Look for learning goals
-            if 'learning goal' in text or '학습 목표' in text:
-                metadata['learning_goals'].append({
-                    'page': page['page_number'],
-                    'text': page['text']
-                })
+            if analysis['has_learning_goal']:
+                metadata['learning_goals'].append(entry)
             
             # Look for homework indicators
-            if 'homework' in text or '숙제' in text or '과제' in text:
-                metadata['homework_tasks'].append({
-                    'page': page['page_number'],
-                    'text': page['text']
-                })
+            if analysis['has_homework']:
+                metadata['homework_tasks'].append(entry)
             
             # Look for review questions
-            if 'review' in text or 'question' in text or '복습' in text or '문제' in text:
-                metadata['review_questions'].append({
-                    'page': page['page_number'],
-                    'text': page['text']
-                })
+            if analysis['has_review']:
+                metadata['review_questions'].append(entry)
         
         return metadata
@@ -4,45 +4,442 @@ Handles writing data to Google Sheets
 """
 
 import os
+import ssl
+import gzip
+import json
+import time
 import pickle
-from typing import List, Dict, Optional
-from google.auth.transport.requests import Request
+import random
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
+import httplib2
+from google.auth.transport.requests import AuthorizedSession, Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# If modifying these scopes, delete the token.pickle file
+
+# If modifying these scopes, delete the token.json file
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Transient network failures (ConnectionError covers BrokenPipeError and
+# http.client.RemoteDisconnected)
+RETRY_EXCEPTIONS = (ConnectionError, ssl.SSLError, socket.timeout,
+                    RequestsConnectionError, RequestsTimeout)
+
+# Columns of the unit management table
+_HEADERS = (
+    '차수 (Comma/Session)', '대단원 (Major Unit)', '소주제/테마 (Subtopic/Theme)',
+    '페이지 범위 (Page Range)', '학습 목표 및 튜터 코칭 포인트 (Learning Goals and Tutor Coaching Points)',
+    '숙제 (Homework)', '체크 테스트 (Check Test)', '날짜 (Date)', '완료 상태 (Completion Status)'
+)
+
+# Header row as updateCells row data, built once for every setup_headers call
+_HEADER_ROW = {'values': [{'userEnteredValue': {'stringValue': header}} for header in _HEADERS]}
+
+# Header row format (light gray background, bold), shared by every
+# setup_headers call; only the target range differs
+_HEADER_FORMAT_TEMPLATE = {
+    'cell': {
+        'userEnteredFormat': {
+            'backgroundColor': {
+                'red': 0.9,
+                'green': 0.9,
+                'blue': 0.9
+            },
+            'textFormat': {
+                'bold': True
+            }
+        }
+    },
+    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+}
+
+
+def _span_union(a: Tuple[int, Optional[int]], b: Tuple[int, Optional[int]]) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    Union two half-open index spans if they overlap or touch
+    
+    Args:
+        a: (start, end) span; an end of None is unbounded
+        b: (start, end) span; an end of None is unbounded
+        
+    Returns:
+        Combined span, or None if there is a gap between them
+    """
+    (a_start, a_end), (b_start, b_end) = a, b
+    if (a_end is not None and b_start > a_end) or (b_end is not None and a_start > b_end):
+        return None
+    end = None if a_end is None or b_end is None else max(a_end, b_end)
+    return min(a_start, b_start), end
+
+
+def _merge_repeat_cells(requests: List[Dict]) -> List[Dict]:
+    """
+    Merge consecutive repeatCell requests that apply the same format to
+    adjacent ranges
+    
+    batchUpdate applies every request as sent, so identical formats over
+    neighbouring rows (or columns) would otherwise be repeated per range.
+    Only back-to-back requests are merged, which keeps the order in which
+    overlapping formats are applied.
+    
+    Args:
+        requests: batchUpdate requests
+        
+    Returns:
+        Requests with mergeable repeatCell requests combined
+    """
+    merged = []
+    last_key = None
+    for request in requests:
+        repeat = request.get('repeatCell')
+        if repeat is None:
+            merged.append(request)
+            last_key = None
+            continue
+        
+        rng = repeat.get('range', {})
+        key = (rng.get('sheetId', 0), repeat.get('fields'), json.dumps(repeat.get('cell'), sort_keys=True))
+        rows = (rng.get('startRowIndex', 0), rng.get('endRowIndex'))
+        cols = (rng.get('startColumnIndex', 0), rng.get('endColumnIndex'))
+        
+        if key == last_key:
+            prev = merged[-1]['repeatCell']['range']
+            prev_rows = (prev.get('startRowIndex', 0), prev.get('endRowIndex'))
+            prev_cols = (prev.get('startColumnIndex', 0), prev.get('endColumnIndex'))
+            if cols == prev_cols:
+                union, start_key, end_key = _span_union(prev_rows, rows), 'startRowIndex', 'endRowIndex'
+            elif rows == prev_rows:
+                union, start_key, end_key = _span_union(prev_cols, cols), 'startColumnIndex', 'endColumnIndex'
+            else:
+                union = None
+            if union is not None:
+                combined = dict(prev)
+                combined[start_key] = union[0]
+                if union[1] is None:
+                    combined.pop(end_key, None)
+                else:
+                    combined[end_key] = union[1]
+                merged[-1] = {'repeatCell': {**merged[-1]['repeatCell'], 'range': combined}}
+                continue
+        
+        merged.append(request)
+        last_key = key
+    return merged
+
+
+def _validate_rows(rows: List[List], width: int = len(_HEADERS)) -> List[List]:
+    """
+    Check row shapes and cell types locally before they are sent
+    
+    A ragged row or a nested value would otherwise only fail after a
+    round trip to the API.
+    
+    Args:
+        rows: Rows to append
+        width: Number of values each row must have (one per header column)
+        
+    Returns:
+        Rows with None cells replaced by empty strings
+    """
+    validated = []
+    for index, row in enumerate(rows):
+        if len(row) != width:
+            raise ValueError(f"Row {index} has {len(row)} values, expected {width}")
+        if None in row:
+            row = ['' if cell is None else cell for cell in row]
+        for cell in row:
+            if not isinstance(cell, (str, int, float)):
+                raise TypeError(f"Row {index} has a {type(cell).__name__} value; "
+                                "cells must be strings, numbers or booleans")
+        validated.append(row)
+    return validated
+
+
+class _SessionHttp:
+    """
+    httplib2.Http-compatible wrapper around a requests AuthorizedSession
+    
+    The API client only talks to httplib2-style transports; this lets it
+    use a pooled session that keeps TLS connections alive between calls.
+    """
+    
+    # Seconds to wait for a connection or response, as httplib2 did via build_http()
+    TIMEOUT = 60
+    
+    # When gzip_requests is enabled, JSON request bodies larger than this are compressed
+    GZIP_MIN_BYTES = 1024
+    
+    # Moderate level: most of the size reduction at a fraction of level 9's CPU
+    GZIP_LEVEL = 6
+    
+    def __init__(self, session: AuthorizedSession, gzip_requests: bool = False):
+        self.session = session
+        self.gzip_requests = gzip_requests
+        # Read by the API client to authorize batch sub-requests
+        self.credentials = session.credentials
+    
+    def _compress(self, body, headers: Dict[str, str]):
+        """
+        Gzip a large JSON request body if gzip_requests is enabled
+        
+        Args:
+            body: Request body
+            headers: Request headers, updated with Content-Encoding
+            
+        Returns:
+            Body to send
+        """
+        content_type = headers.get('content-type', headers.get('Content-Type', ''))
+        if (not self.gzip_requests or not body or not content_type.startswith('application/json')
+                or 'content-encoding' in {name.lower() for name in headers}):
+            return body
+        
+        if len(body) <= self.GZIP_MIN_BYTES:
+            return body
+        
+        headers['Content-Encoding'] = 'gzip'
+        headers.pop('content-length', None)
+        headers.pop('Content-Length', None)
+        return gzip.compress(body, compresslevel=self.GZIP_LEVEL)
+    
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        headers = dict(headers or {})
+        # Send bytes so Content-Length counts bytes, not characters
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        body = self._compress(body, headers)
+        response = self.session.request(method, uri, data=body, headers=headers,
+                                        timeout=self.TIMEOUT)
+        info = dict(response.headers)
+        info['status'] = response.status_code
+        return httplib2.Response(info), response.content
+    
+    def close(self):
+        self.session.close()
+
+
+class _OrjsonModel(JsonModel):
+    """
+    JsonModel that encodes and decodes bodies with orjson
+    
+    Serializing large value grids is otherwise CPU-bound in the stdlib
+    json module. Bodies are raw UTF-8 rather than ASCII-escaped, so this
+    model must not be used for multipart batch sub-requests.
+    """
+    
+    def serialize(self, body_value):
+        if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+            body_value = {"data": body_value}
+        return orjson.dumps(body_value).decode('utf-8')
+    
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
 
 class GoogleSheetsWriter:
     """
     Write data to Google Sheets
+    
+    Rows passed to append_row can be buffered and sent in one request:
+    
+        with writer:
+            for row in rows:
+                writer.append_row(spreadsheet_id, "Sheet1", row)
     """
     
-    def __init__(self, credentials_path: str = "config/credentials.json", token_path: str = "config/token.pickle"):
+    # Buffered rows are flushed automatically once this many accumulate
+    MAX_BATCH_ROWS = 1000
+    
+    # Rows per append request, keeping large imports under the API's request size limit
+    APPEND_CHUNK_ROWS = 5000
+    
+    # Sub-requests allowed in one multipart batch request
+    MAX_BATCH_REQUESTS = 1000
+    
+    # Attempts per API call, and the base of the exponential backoff in seconds
+    RETRY_MAX_ATTEMPTS = 6
+    RETRY_BASE_DELAY = 0.5
+    
+    # Partial-response masks: only the parts of each reply callers read
+    UPDATE_FIELDS = 'updatedRange,updatedRows,updatedCells'
+    BATCH_UPDATE_VALUES_FIELDS = 'totalUpdatedRows,totalUpdatedCells'
+    APPEND_FIELDS = 'updates(updatedRange,updatedRows)'
+    
+    # Connection pool for the shared HTTPS session
+    POOL_CONNECTIONS = 10
+    POOL_MAXSIZE = 20
+    
+    def __init__(self, credentials_path: str = "config/credentials.json", token_path: str = "config/token.json",
+                 gzip_requests: bool = False):
         """
         Initialize Google Sheets writer
         
         Args:
             credentials_path: Path to Google API credentials JSON file
             token_path: Path to store authentication token
+            gzip_requests: Gzip-compress JSON request bodies over 1 KiB
+                (Content-Encoding: gzip). Off by default: it has not yet
+                been verified that the Sheets API accepts compressed bodies.
         """
         self.credentials_path = credentials_path
         self.token_path = token_path
-        self.service = None
-        self._authenticate()
+        self.gzip_requests = gzip_requests
+        self._service = None
+        self._batch_service = None
+        self._service_lock = threading.Lock()
+        self._batching = False
+        self._pending: List[List] = []
+        self._pending_target: Optional[Tuple[str, str]] = None
+        self._batch_results: Dict[str, object] = {}
+        self._sheet_id_cache: Dict[Tuple[str, str], int] = {}
+    
+    @property
+    def service(self):
+        """Sheets API service, authenticated on first use"""
+        if self._service is None:
+            with self._service_lock:
+                if self._service is None:
+                    self._authenticate()
+        return self._service
+    
+    @property
+    def batch_service(self):
+        """Sheets API service for multipart batch requests, using the stock JSON model"""
+        if self._service is None:
+            self.service  # builds both services
+        return self._batch_service
+    
+    def __enter__(self):
+        self.begin_batch()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Send buffered rows only if the block completed; drop them on error
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            self._batching = False
+            self._pending = []
+            self._pending_target = None
+    
+    def begin_batch(self):
+        """Start buffering append_row calls until flush is called"""
+        self._batching = True
+    
+    def flush(self, spreadsheet_id: Optional[str] = None, sheet_name: Optional[str] = None):
+        """
+        Send buffered rows in a single append request
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet (defaults to the buffered rows' target)
+            sheet_name: Name of the sheet (defaults to the buffered rows' target)
+            
+        Returns:
+            API response, or None if nothing was buffered
+        """
+        if not self._pending:
+            return None
+        
+        target_id, target_sheet = self._pending_target
+        rows = self._pending
+        self._pending = []
+        self._pending_target = None
+        return self.batch_append_rows(spreadsheet_id or target_id, sheet_name or target_sheet, rows)
+    
+    def _execute(self, request, idempotent: bool = True):
+        """
+        Execute an API request, retrying transient failures with exponential
+        backoff and full jitter
+        
+        Non-idempotent requests (creating a spreadsheet, appending rows) are
+        only retried on 429, which the API returns without applying the
+        request; after a server or network error they may already have
+        taken effect.
+        
+        Args:
+            request: HttpRequest or BatchHttpRequest to execute
+            idempotent: Whether the request is safe to send more than once
+            
+        Returns:
+            API response
+        """
+        for attempt in range(self.RETRY_MAX_ATTEMPTS):
+            last_attempt = attempt == self.RETRY_MAX_ATTEMPTS - 1
+            try:
+                return request.execute()
+            except HttpError as err:
+                status = err.resp.status
+                retryable = status == 429 or (idempotent and status in RETRY_STATUSES)
+                if not retryable or last_attempt:
+                    raise
+            except RETRY_EXCEPTIONS:
+                if not idempotent or last_attempt:
+                    raise
+            time.sleep(random.uniform(0, self.RETRY_BASE_DELAY * 2 ** attempt))
+    
+    def _save_token(self, creds: Credentials):
+        """
+        Save OAuth credentials as JSON
+        
+        Args:
+            creds: Credentials to save
+        """
+        token_dir = os.path.dirname(self.token_path)
+        if token_dir:
+            os.makedirs(token_dir, exist_ok=True)
+        with open(self.token_path, 'w') as token:
+            token.write(creds.to_json())
+    
+    def _migrate_pickle_token(self) -> Optional[Credentials]:
+        """
+        Convert a token.pickle left by older versions into the JSON token
+        
+        Returns:
+            Migrated credentials, or None if there is no pickled token
+        """
+        legacy_path = os.path.splitext(self.token_path)[0] + '.pickle'
+        if legacy_path == self.token_path or not os.path.exists(legacy_path):
+            return None
+        
+        with open(legacy_path, 'rb') as token:
+            creds = pickle.load(token)
+        self._save_token(creds)
+        os.remove(legacy_path)
+        return creds
     
     def _authenticate(self):
         """Authenticate with Google Sheets API"""
         creds = None
         
-        # Load token if it exists
+        # Load token if it exists, migrating a pickled token from older versions
         if os.path.exists(self.token_path):
-            with open(self.token_path, 'rb') as token:
-                creds = pickle.load(token)
+            creds = Credentials.from_authorized_user_file(self.token_path, SCOPES)
+        else:
+            creds = self._migrate_pickle_token()
         
         # If credentials are invalid or don't exist, get new ones
         if not creds or not creds.valid:
@@ -59,11 +456,57 @@ class GoogleSheetsWriter:
                 )
             
             # Save credentials for next run
-            os.makedirs(os.path.dirname(self.token_path), exist_ok=True)
-            with open(self.token_path, 'wb') as token:
-                pickle.dump(creds, token)
+            self._save_token(creds)
+        
+        # Reuse keep-alive connections across API calls
+        session = AuthorizedSession(creds)
+        session.mount('https://', HTTPAdapter(pool_connections=self.POOL_CONNECTIONS,
+                                              pool_maxsize=self.POOL_MAXSIZE))
+        http = _SessionHttp(session, gzip_requests=self.gzip_requests)
+        # The bundled discovery document avoids fetching it over the network.
+        # Batch sub-requests get a content-length computed from the length of
+        # their str body, so they need the stock model's ASCII-escaped JSON;
+        # orjson writes non-ASCII text as raw UTF-8.
+        self._batch_service = build('sheets', 'v4', http=http,
+                                    static_discovery=True, cache_discovery=False)
+        self._service = build('sheets', 'v4', http=http,
+                              static_discovery=True, cache_discovery=False,
+                              model=_OrjsonModel()) if orjson else self._batch_service
+    
+    def _cache_sheet_ids(self, spreadsheet_id: str, sheets: List[Dict]):
+        """
+        Remember the sheet IDs from a spreadsheet's sheet properties
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            sheets: 'sheets' list from a spreadsheet resource
+        """
+        for sheet in sheets:
+            properties = sheet['properties']
+            self._sheet_id_cache[(spreadsheet_id, properties['title'])] = properties['sheetId']
+    
+    def _sheet_id(self, spreadsheet_id: str, sheet_name: str) -> int:
+        """
+        Look up the numeric ID of a sheet, fetching all of the spreadsheet's
+        sheets on the first miss
         
-        self.service = build('sheets', 'v4', credentials=creds)
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            sheet_name: Name of the sheet
+            
+        Returns:
+            Sheet ID
+        """
+        key = (spreadsheet_id, sheet_name)
+        if key not in self._sheet_id_cache:
+            result = self._execute(self.service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets(properties(sheetId,title))'
+            ))
+            self._cache_sheet_ids(spreadsheet_id, result.get('sheets', []))
+            if key not in self._sheet_id_cache:
+                raise ValueError(f"Sheet '{sheet_name}' not found in spreadsheet {spreadsheet_id}")
+        return self._sheet_id_cache[key]
     
     def create_spreadsheet(self, title: str) -> str:
         """
@@ -82,17 +525,38 @@ class GoogleSheetsWriter:
                 }
             }
             
-            result = self.service.spreadsheets().create(
+            result = self._execute(self.service.spreadsheets().create(
                 body=spreadsheet,
-                fields='spreadsheetId'
-            ).execute()
+                fields='spreadsheetId,sheets(properties(sheetId,title))'
+            ), idempotent=False)
             
-            return result.get('spreadsheetId')
+            spreadsheet_id = result.get('spreadsheetId')
+            self._cache_sheet_ids(spreadsheet_id, result.get('sheets', []))
+            return spreadsheet_id
         
         except HttpError as err:
             print(f"An error occurred: {err}")
             raise
     
+    def create_many(self, titles: List[str], max_workers: int = 8) -> List[str]:
+        """
+        Create several spreadsheets concurrently over the shared session
+        
+        Args:
+            titles: Titles of the spreadsheets
+            max_workers: Maximum concurrent requests, capped at the
+                connection pool size
+            
+        Returns:
+            Spreadsheet IDs, in the same order as titles
+        """
+        if not titles:
+            return []
+        
+        workers = min(max_workers, self.POOL_MAXSIZE, len(titles))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.create_spreadsheet, titles))
+    
     def setup_headers(self, spreadsheet_id: str, sheet_name: str = "Sheet1"):
         """
         Set up the standard headers for unit management table
@@ -101,72 +565,72 @@ class GoogleSheetsWriter:
             spreadsheet_id: ID of the spreadsheet
             sheet_name: Name of the sheet
         """
-        headers = [
-            ['차수 (Comma/Session)', '대단원 (Major Unit)', '소주제/테마 (Subtopic/Theme)', 
-             '페이지 범위 (Page Range)', '학습 목표 및 튜터 코칭 포인트 (Learning Goals and Tutor Coaching Points)',
-             '숙제 (Homework)', '체크 테스트 (Check Test)', '날짜 (Date)', '완료 상태 (Completion Status)']
-        ]
-        
         try:
-            # Write headers
-            self.write_data(spreadsheet_id, f"{sheet_name}!A1:I1", headers)
+            sheet_id = self._sheet_id(spreadsheet_id, sheet_name)
             
-            # Format headers (bold, background color)
+            # Write and format headers (bold, background color) in one request
             requests = [
+                {
+                    'updateCells': {
+                        'rows': [_HEADER_ROW],
+                        'fields': 'userEnteredValue',
+                        'start': {
+                            'sheetId': sheet_id,
+                            'rowIndex': 0,
+                            'columnIndex': 0
+                        }
+                    }
+                },
                 {
                     'repeatCell': {
+                        **_HEADER_FORMAT_TEMPLATE,
                         'range': {
-                            'sheetId': 0,
+                            'sheetId': sheet_id,
                             'startRowIndex': 0,
                             'endRowIndex': 1
-                        },
-                        'cell': {
-                            'userEnteredFormat': {
-                                'backgroundColor': {
-                                    'red': 0.9,
-                                    'green': 0.9,
-                                    'blue': 0.9
-                                },
-                                'textFormat': {
-                                    'bold': True
-                                }
-                            }
-                        },
-                        'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+                        }
                     }
                 }
             ]
             
-            body = {'requests': requests}
-            self.service.spreadsheets().batchUpdate(
+            body = {'requests': _merge_repeat_cells(requests)}
+            self._execute(self.service.spreadsheets().batchUpdate(
                 spreadsheetId=spreadsheet_id,
-                body=body
-            ).execute()
+                body=body,
+                fields='spreadsheetId'
+            ))
             
         except HttpError as err:
             print(f"An error occurred: {err}")
             raise
     
-    def write_data(self, spreadsheet_id: str, range_name: str, values: List[List]):
+    def write_data(self, spreadsheet_id: str, range_name: Optional[str],
+                   values: Union[List[List], Dict[str, List[List]]]):
         """
         Write data to spreadsheet
         
         Args:
             spreadsheet_id: ID of the spreadsheet
             range_name: A1 notation range (e.g., 'Sheet1!A2:I2')
-            values: 2D list of values to write
+            values: 2D list of values to write, or a dict mapping A1 ranges
+                to 2D lists to write them all in one request (range_name is
+                then ignored)
         """
+        if isinstance(values, dict):
+            return self.write_many(spreadsheet_id, list(values.items()))
+        
         try:
             body = {
                 'values': values
             }
             
-            result = self.service.spreadsheets().values().update(
+            result = self._execute(self.service.spreadsheets().values().update(
                 spreadsheetId=spreadsheet_id,
                 range=range_name,
                 valueInputOption='RAW',
-                body=body
-            ).execute()
+                body=body,
+                fields=self.UPDATE_FIELDS
+            ))
             
             return result
         
@@ -174,27 +638,28 @@ class GoogleSheetsWriter:
             print(f"An error occurred: {err}")
             raise
     
-    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: List):
+    def write_many(self, spreadsheet_id: str, ranges: List[Tuple[str, List[List]]]):
         """
-        Append a row to the spreadsheet
+        Write several ranges in a single values.batchUpdate call
         
         Args:
             spreadsheet_id: ID of the spreadsheet
-            sheet_name: Name of the sheet
-            row_data: List of values for the row
+            ranges: List of (A1 notation range, 2D list of values) pairs
         """
         try:
             body = {
-                'values': [row_data]
+                'valueInputOption': 'RAW',
+                'data': [
+                    {'range': range_name, 'values': values}
+                    for range_name, values in ranges
+                ]
             }
             
-            result = self.service.spreadsheets().values().append(
+            result = self._execute(self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=spreadsheet_id,
-                range=f"{sheet_name}!A:I",
-                valueInputOption='RAW',
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
+                body=body,
+                fields=self.BATCH_UPDATE_VALUES_FIELDS
+            ))
             
             return result
         
@@ -202,34 +667,145 @@ class GoogleSheetsWriter:
             print(f"An error occurred: {err}")
             raise
     
+    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: List):
+        """
+        Append a row to the spreadsheet
+        
+        While a batch is active the row is only buffered (see begin_batch)
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            sheet_name: Name of the sheet
+            row_data: List of values for the row
+        """
+        row_data = _validate_rows([row_data])[0]
+        
+        if self._batching:
+            # Rows for another sheet can't share a request; send those first
+            if self._pending_target not in (None, (spreadsheet_id, sheet_name)):
+                self.flush()
+            self._pending_target = (spreadsheet_id, sheet_name)
+            self._pending.append(row_data)
+            if len(self._pending) >= self.MAX_BATCH_ROWS:
+                return self.flush()
+            return None
+        
+        try:
+            return self._execute(self._append_request(spreadsheet_id, sheet_name, [row_data]),
+                                 idempotent=False)
+        
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            raise
+    
+    def _append_request(self, spreadsheet_id: str, sheet_name: str, rows_data: List[List]):
+        """
+        Build (and serialize) an append request without executing it
+        
+        Args:
+            spreadsheet_id: ID of the spreadsheet
+            sheet_name: Name of the sheet
+            rows_data: List of rows, where each row is a list of values
+            
+        Returns:
+            HttpRequest for values.append
+        """
+        return self.service.spreadsheets().values().append(
+            spreadsheetId=spreadsheet_id,
+            range=f"{sheet_name}!A:I",
+            valueInputOption='RAW',
+            insertDataOption='INSERT_ROWS',
+            body={'values': rows_data},
+            fields=self.APPEND_FIELDS
+        )
+    
     def batch_append_rows(self, spreadsheet_id: str, sheet_name: str, rows_data: List[List]):
         """
         Append multiple rows to the spreadsheet
         
+        More than APPEND_CHUNK_ROWS rows are sent as consecutive appends, in
+        order; each chunk's request body is built while the previous chunk
+        is in flight. If a chunk fails, the chunks before it stay written.
+        
         Args:
             spreadsheet_id: ID of the spreadsheet
             sheet_name: Name of the sheet
             rows_data: List of rows, where each row is a list of values
+            
+        Returns:
+            API response; for several chunks, 'updates' holds the total
+            updatedRows
         """
+        rows_data = _validate_rows(rows_data)
+        
         try:
-            body = {
-                'values': rows_data
-            }
+            if len(rows_data) <= self.APPEND_CHUNK_ROWS:
+                return self._execute(self._append_request(spreadsheet_id, sheet_name, rows_data),
+                                     idempotent=False)
             
-            result = self.service.spreadsheets().values().append(
-                spreadsheetId=spreadsheet_id,
-                range=f"{sheet_name}!A:I",
-                valueInputOption='RAW',
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
+            chunks = [rows_data[start:start + self.APPEND_CHUNK_ROWS]
+                      for start in range(0, len(rows_data), self.APPEND_CHUNK_ROWS)]
+            updated_rows = 0
+            # Appends must land in order, so only request building runs ahead
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pending = executor.submit(self._append_request, spreadsheet_id, sheet_name, chunks[0])
+                for next_chunk in chunks[1:] + [None]:
+                    request = pending.result()
+                    if next_chunk is not None:
+                        pending = executor.submit(self._append_request, spreadsheet_id,
+                                                  sheet_name, next_chunk)
+                    result = self._execute(request, idempotent=False)
+                    updated_rows += result.get('updates', {}).get('updatedRows', 0)
             
-            return result
+            return {'updates': {'updatedRows': updated_rows}}
         
         except HttpError as err:
             print(f"An error occurred: {err}")
             raise
     
+    def batch_write(self, updates: List[Tuple[str, str, List[List]]]) -> Dict[str, object]:
+        """
+        Write independent ranges, possibly in different spreadsheets, with
+        multipart batch requests
+        
+        Args:
+            updates: List of (spreadsheet ID, A1 notation range, 2D list of values)
+            
+        Returns:
+            Mapping of request ID (the update's index as a string) to its
+            API response, or to the HttpError raised for that update
+        """
+        self._batch_results = {}
+        
+        try:
+            for start in range(0, len(updates), self.MAX_BATCH_REQUESTS):
+                batch = self.batch_service.new_batch_http_request(callback=self._batch_cb)
+                
+                for offset, (spreadsheet_id, range_name, values) in enumerate(
+                        updates[start:start + self.MAX_BATCH_REQUESTS]):
+                    batch.add(
+                        self.batch_service.spreadsheets().values().update(
+                            spreadsheetId=spreadsheet_id,
+                            range=range_name,
+                            valueInputOption='RAW',
+                            body={'values': values},
+                            fields=self.UPDATE_FIELDS
+                        ),
+                        request_id=str(start + offset)
+                    )
+                
+                self._execute(batch)
+            
+            return self._batch_results
+        
+        except HttpError as err:
+            print(f"An error occurred: {err}")
+            raise
+    
+    def _batch_cb(self, request_id: str, response: Optional[Dict], exception: Optional[HttpError]):
+        """Collect the outcome of one batch sub-request"""
+        self._batch_results[request_id] = exception if exception is not None else response
+    
     def get_spreadsheet_url(self, spreadsheet_id: str) -> str:
         """
         Get the URL for a spreadsheet